@@ -1,27 +1,153 @@
 import srt
 import requests
+from requests.adapters import HTTPAdapter # For connection pooling on the shared session
 import json
+try:
+    import orjson # Optional: serializes request bodies several times faster than the json module
+except ImportError:
+    orjson = None
 import argparse
 import os
 import shutil # For more robust renaming/moving if needed
 from tqdm import tqdm
 import re # Added for regular expressions
 from concurrent.futures import ThreadPoolExecutor, as_completed # Added for parallelism
+import queue
 import threading # For tqdm lock if needed, though often not strictly necessary for basic use
+import atexit
+import logging
+import logging.handlers
+import sys
+import random
+import time
+from functools import lru_cache
 
 # --- Configuration (can be overridden by args) ---
-OLLAMA_API_URL = "http://127.0.0.1:11434/api/generate" # Your custom URL
+OLLAMA_API_URL = "http://127.0.0.1:11434/api/chat" # Your custom URL
+OPENAI_API_URL = "http://127.0.0.1:8080/v1/chat/completions" # OpenAI-compatible server, e.g. llama.cpp's llama-server
+API_OLLAMA = "ollama"
+API_OPENAI = "openai"
+DEFAULT_API_URLS = {API_OLLAMA: OLLAMA_API_URL, API_OPENAI: OPENAI_API_URL}
 DEFAULT_OLLAMA_MODEL = "qwen3:30b-a3b" # Your specified model
-REQUEST_TIMEOUT = 180  # Increased timeout for potentially longer texts
+REQUEST_TIMEOUT = 180  # Read timeout: longest wait for the first byte (requests queue inside the server) or between streamed chunks
+CONNECT_TIMEOUT = 10 # Connecting is instant on a running server, so an unreachable one fails fast
+CHAT_TIMEOUT = (CONNECT_TIMEOUT, REQUEST_TIMEOUT)
+MAX_ATTEMPTS = 3 # Attempts per request for timeouts and 5xx responses
+RETRY_BACKOFF = 0.5 # Seconds before the first retry; doubled for every further attempt
+BATCH_SIZE = 16 # Number of subtitle lines sent to the model in a single request
+DEFAULT_CONCURRENCY = 4 # Maximum number of Ollama requests in flight at once (match OLLAMA_NUM_PARALLEL)
+OLLAMA_KEEP_ALIVE = "30m" # How long Ollama keeps the model (and its prompt cache) loaded after a request
+DEFAULT_TEMPERATURE = 0 # Deterministic decoding; translations don't benefit from sampling
+DEFAULT_NUM_CTX = 2048 # Context window; enough for the system prompt plus a batch and its translation
+SINGLE_LINE_STOP = ["\n\n", "```"] # A single subtitle never contains a blank line
+BATCH_STOP = ["```"] # Batched replies may separate the numbered lines with blank lines
+INTERN_MAX_LENGTH = 128 # Subtitle texts shorter than this are interned so repeated lines share one string
+DEFAULT_CACHE_FILE = os.path.join(".cache", "translations.json") # Translations reused across runs
+
+# Shared HTTP session so every worker reuses keep-alive connections instead of
+# opening a new TCP connection per subtitle line. Pool sizes are set in main().
+SESSION = requests.Session()
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Marker used to keep multi-line subtitles on a single numbered line in batch prompts.
+BATCH_LINE_BREAK = "<br>"
+BATCH_ITEM_RE = re.compile(r"^\s*(\d+)\s*[.)]\s?(.*)$")
+
+# Compiled once; the cleaning step runs for every translated line.
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL | re.IGNORECASE)
+_UNCLOSED_THINK_RE = re.compile(r"<think>.*\Z", re.DOTALL | re.IGNORECASE)
+_DOTS = "..."
+
+# Lines with no letters (music notes, numbers, dashes, ellipses, ...) are not sent to the model.
+TRIVIAL_RE = re.compile(r"^[\W\d_]*$")
+# Formatting tags such as <i>...</i> or {\an8}, ignored when deciding whether a line is trivial.
+SUBTITLE_TAG_RE = re.compile(r"<[^>]*>|\{[^}]*\}")
+
+# Translations shared by all threads, keyed by (source language, target language, model, text).
+# Subtitles repeat short lines ("Yes.", names, catchphrases) a lot; each is only sent to the model once.
+_TRANS_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+LOG = logging.getLogger("subxlate")
+# Shared by tqdm and the log handler so log lines and the progress bar never interleave.
+TQDM_LOCK = threading.RLock()
 
 # --- Helper Functions ---
-def translate_text_ollama(text, source_language_name, target_language_name, model_name, ollama_url):
+class TqdmLoggingHandler(logging.StreamHandler):
+    """Writes log records with tqdm.write so they are printed above the progress bar."""
+
+    def emit(self, record):
+        try:
+            with TQDM_LOCK:
+                tqdm.write(self.format(record), file=self.stream)
+        except Exception:
+            self.handleError(record)
+
+
+def setup_logging():
     """
-    Translates a single piece of text using the Ollama API.
+    Sends all log records through a queue to a single listener thread that writes them to stderr,
+    so worker threads never block on (or interleave) terminal writes.
     """
-    # Revised prompt for clarity and to guide the model better
-    prompt = (
-        f"You are an expert translator specializing in subtitle files.  /no_think Your task is to translate the given text from {source_language_name} to {target_language_name}.\n\n"
+    tqdm.set_lock(TQDM_LOCK)
+    log_queue = queue.Queue()
+    listener = logging.handlers.QueueListener(log_queue, TqdmLoggingHandler(sys.stderr))
+    LOG.addHandler(logging.handlers.QueueHandler(log_queue))
+    LOG.setLevel(logging.INFO)
+    LOG.propagate = False
+    listener.start()
+    atexit.register(listener.stop)
+
+
+def configure_http_session(workers):
+    """Mounts a connection pool on the shared session sized for the number of workers."""
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers * 2)
+    SESSION.mount("http://", adapter)
+    SESSION.mount("https://", adapter)
+
+
+def post_json(url, payload, timeout, stream=False):
+    """POSTs `payload` as a JSON body on the shared session, serialized with orjson when it is installed."""
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return SESSION.post(url, data=body, headers=JSON_HEADERS, timeout=timeout, stream=stream)
+
+
+def intern_text(text):
+    """Returns the interned copy of a short text, so equal lines across files and the cache share one object."""
+    return sys.intern(text) if len(text) < INTERN_MAX_LENGTH else text
+
+
+def is_trivial_text(text):
+    """Returns True if the text has nothing to translate (empty, or only digits/punctuation/symbols)."""
+    return not text or TRIVIAL_RE.match(SUBTITLE_TAG_RE.sub("", text)) is not None
+
+
+def get_cached_translation(text, source_language_name, target_language_name, model_name):
+    """Returns the cached translation of `text`, or None if it has not been translated yet."""
+    with _CACHE_LOCK:
+        return _TRANS_CACHE.get((source_language_name, target_language_name, model_name, text))
+
+
+def cache_translation(text, translated_text, source_language_name, target_language_name, model_name):
+    """Stores a successful translation so later occurrences of the same text skip the API."""
+    text, translated_text = intern_text(text), intern_text(translated_text)
+    with _CACHE_LOCK:
+        _TRANS_CACHE[(source_language_name, target_language_name, model_name, text)] = translated_text
+
+
+@lru_cache(maxsize=8)
+def build_prompt_templates(source_language_name, target_language_name):
+    """
+    Returns (system_prompt, common_prefixes_lower) for a language pair, built once per run.
+    The system prompt is byte-identical for every request so Ollama can reuse the cached prompt
+    prefix; only the user message (the subtitle text) changes between requests.
+    The prefixes are the lowercased conversational lead-ins the model sometimes puts before a translation.
+    """
+    system_prompt = (
+        f"You are an expert translator specializing in subtitle files. Your task is to translate the text of each user message from {source_language_name} to {target_language_name}.\n\n"
         f"**Instructions**:\n"
         f"1. Provide *only* the direct translation of the text.\n"
         f"2. Do *not* include any of your own commentary, thoughts, explanations, introductions, or conversational phrases (e.g., 'Here is the translation:', 'Okay, I will translate that for you:').\n"
@@ -30,92 +156,389 @@ def translate_text_ollama(text, source_language_name, target_language_name, mode
         f"5. Preserve the original meaning, nuance, and tone as faithfully as possible.\n"
         f"6. Maintain any existing line breaks within the subtitle text if they are important for formatting.\n"
         f"7. If the text contains proper names, specific technical terms, or unique cultural references that do not have direct equivalents or should remain in the original language, keep them as they are.\n\n"
-        f"**Original {source_language_name} text to translate**:\n\"\"\"\n{text}\n\"\"\"\n\n"
-        f"**Your {target_language_name} translation**:"
+        f"**Numbered input**:\n"
+        f"If the message is a numbered list of subtitle lines ('1. ...', '2. ...'), translate every line separately and reply with "
+        f"the same numbered list: the same numbers, in the same order, one translation per number. "
+        f"Line breaks inside a subtitle are written as '{BATCH_LINE_BREAK}'; keep every '{BATCH_LINE_BREAK}' marker in place."
     )
+    # This list can be expanded if other prefixes are observed.
+    common_prefixes = [
+        f"Your {target_language_name} translation:", # From our own prompt completion
+        "Translated text:",
+        "Translation:",
+        "Here is the translation:",
+        f"The {target_language_name} translation is:",
+        f"The translation from {source_language_name} to {target_language_name} is:"
+    ]
+    return system_prompt, tuple(prefix.lower() for prefix in common_prefixes)
+
+
+def build_chat_messages(source_language_name, target_language_name, text):
+    """Returns the chat messages for one request: the fixed system prompt followed by the text."""
+    system_prompt, _ = build_prompt_templates(source_language_name, target_language_name)
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": text},
+    ]
+
+
+def build_ollama_options(temperature=DEFAULT_TEMPERATURE, num_ctx=DEFAULT_NUM_CTX):
+    """
+    Returns the Ollama options shared by every request of a run.
+    num_ctx must stay the same across requests; changing it makes Ollama reload the model.
+    """
+    return {"temperature": temperature, "top_p": 1.0, "num_ctx": num_ctx}
+
+
+def request_options(ollama_options, text, stop):
+    """Returns the options for one request: the run-wide options plus an output limit sized to `text`."""
+    return {
+        **(ollama_options or build_ollama_options()),
+        "num_predict": max(64, int(len(text) * 0.8)),
+        "stop": stop
+    }
 
+
+def load_ollama_model(model_name, ollama_url, keep_alive=OLLAMA_KEEP_ALIVE, ollama_options=None):
+    """Asks Ollama to load the model into memory and keep it resident for `keep_alive`."""
     payload = {
         "model": model_name,
-        "prompt": prompt,
-        "stream": False
-        # Optionally, you might try adding model-specific options if available, e.g.:
-        # "options": {"temperature": 0.2, "repeat_penalty": 1.1}
+        "messages": [],
+        "keep_alive": keep_alive,
+        "options": ollama_options or build_ollama_options()
     }
     try:
-        response = requests.post(ollama_url, json=payload, timeout=REQUEST_TIMEOUT)
-        response.raise_for_status()
-        response_data = response.json()
-        translated_text = response_data.get("response", "")
-
-        # --- Start of Cleaning ---
-
-        # 1. Remove <think>...</think> patterns (case-insensitive, multiline)
-        #    This handles tags that might contain newlines or varying content.
-        translated_text = re.sub(r"<think>.*?</think>", "", translated_text, flags=re.DOTALL | re.IGNORECASE)
-
-        # 2. Remove standalone or potentially malformed <think> or </think> tags.
-        #    These are case-sensitive simple replacements as a fallback or for specific known strings.
-        translated_text = translated_text.replace("<think>", "")
-        translated_text = translated_text.replace("</think>", "")
-        translated_text = translated_text.replace("...", "")
-        # You can add more specific tag cleaning here if other unwanted tags appear.
-
-        # 3. Strip leading/trailing whitespace. Important before quote checking and for general cleanliness.
-        translated_text = translated_text.strip()
-
-        # 4. Strip leading/trailing quotes ONLY if they encapsulate the ENTIRE string.
-        #    The prompt already instructs the model not to do this, but this is a fallback.
-        if len(translated_text) >= 2: # Avoid errors on empty or single-character strings
-            if translated_text.startswith('"') and translated_text.endswith('"'):
-                translated_text = translated_text[1:-1]
-            elif translated_text.startswith("'") and translated_text.endswith("'"):
-                translated_text = translated_text[1:-1]
-            # Consider adding other quote types if your model uses them (e.g., curly quotes “ ”)
-            # elif translated_text.startswith('“') and translated_text.endswith('”'):
-            #    translated_text = translated_text[1:-1]
-
-        # 5. Remove common conversational prefixes that might have slipped through.
-        #    This list can be expanded if other prefixes are observed.
-        common_prefixes = [
-            f"Your {target_language_name} translation:", # From our own prompt completion
-            "Translated text:",
-            "Translation:",
-            "Here is the translation:",
-            f"The {target_language_name} translation is:",
-            f"The translation from {source_language_name} to {target_language_name} is:"
-        ]
-        # Ensure prefixes are checked case-insensitively
-        temp_lower_text = translated_text.lower()
-        for prefix in common_prefixes:
-            if temp_lower_text.startswith(prefix.lower()):
-                translated_text = translated_text[len(prefix):].lstrip() # lstrip to remove any space after prefix
-                temp_lower_text = translated_text.lower() # Update for next iteration if multiple prefixes match
-                # break # Usually, only one such prefix would occur. If multiple could stack, remove break.
-
-        # 6. Final strip to clean up any whitespace potentially left by the above operations.
-        translated_text = translated_text.strip()
-
-        # --- End of Cleaning ---
-
-        return translated_text
+        post_json(ollama_url, payload, REQUEST_TIMEOUT).raise_for_status()
+    except Exception as e:
+        LOG.warning(f"[WARNING] Could not preload Ollama model '{model_name}': {e}")
+
+
+def warm_up_ollama(source_language_name, target_language_name, model_name, ollama_url, keep_alive=OLLAMA_KEEP_ALIVE, ollama_options=None,
+                   api=API_OLLAMA):
+    """
+    Sends a tiny request with the system prompt so the model is loaded and the
+    prompt prefix is cached before the first real subtitle line is translated.
+    """
+    messages = build_chat_messages(source_language_name, target_language_name, "Hello.")
+    options = {**(ollama_options or build_ollama_options()), "num_predict": 1}
+    payload = build_chat_payload(api, model_name, messages, keep_alive, options, stream=False)
+    try:
+        post_json(ollama_url, payload, REQUEST_TIMEOUT).raise_for_status()
+    except Exception as e:
+        LOG.warning(f"[Thread-{threading.get_ident()}] [WARNING] Ollama warm-up request failed: {e}")
+
+
+def retry_delay(attempt):
+    """Returns the jittered exponential backoff before retrying after failed attempt number `attempt`."""
+    return RETRY_BACKOFF * 2 ** attempt + random.random() * 0.2
+
+
+def post_with_retries(ollama_url, payload, timeout, stream=False):
+    """
+    POSTs the payload on the shared session and returns the successful response.
+    Timeouts and 5xx responses (e.g. while Ollama reloads the model) are retried with jittered
+    exponential backoff; the last error is raised if every attempt fails.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            response = post_json(ollama_url, payload, timeout, stream=stream)
+            response.raise_for_status()
+            return response
+        except (requests.exceptions.Timeout, requests.exceptions.HTTPError) as e:
+            is_server_error = isinstance(e, requests.exceptions.HTTPError) and e.response is not None and e.response.status_code >= 500
+            if attempt == MAX_ATTEMPTS - 1 or not (isinstance(e, requests.exceptions.Timeout) or is_server_error):
+                raise
+            if is_server_error:
+                e.response.close() # Hand the pooled connection back before retrying
+            delay = retry_delay(attempt)
+            LOG.warning(f"[Thread-{threading.get_ident()}] [WARNING] Ollama request failed ({e}). Retrying in {delay:.1f}s (attempt {attempt + 2}/{MAX_ATTEMPTS}).")
+            time.sleep(delay)
+
+
+def build_chat_payload(api, model_name, messages, keep_alive, options, stream):
+    """Returns the request body for a chat request in the wire format of `api`."""
+    if api == API_OPENAI:
+        # OpenAI-compatible servers take the sampling settings at the top level; the context
+        # size and model residency are fixed when the server is started.
+        payload = {
+            "model": model_name,
+            "messages": messages,
+            "stream": stream,
+            "temperature": options.get("temperature"),
+            "top_p": options.get("top_p"),
+            "max_tokens": options.get("num_predict"),
+            "stop": options.get("stop"),
+            # llama-server's counterpart of Ollama's "think": False. Reasoning models such as qwen3
+            # think by default, and the reply would be cut off (max_tokens) inside the trace.
+            "chat_template_kwargs": {"enable_thinking": False}
+        }
+        return {key: value for key, value in payload.items() if value is not None}
+    return {
+        "model": model_name,
+        "messages": messages,
+        "stream": stream,
+        "keep_alive": keep_alive,
+        "think": False, # Thinking-capable models would otherwise decode (and we'd discard) a reasoning trace
+        "options": options
+    }
+
+
+def iter_stream_content(response, api):
+    """Yields the pieces of message content from a streamed chat response."""
+    for line in response.iter_lines():
+        if not line:
+            continue
+        if api == API_OPENAI:
+            # Server-sent events: 'data: {...}' lines, terminated by 'data: [DONE]'.
+            if not line.startswith(b"data:"):
+                continue
+            data = line[len(b"data:"):].strip()
+            if data == b"[DONE]":
+                return
+            chunk = json.loads(data)
+            if "error" in chunk:
+                raise RuntimeError(chunk["error"])
+            for choice in chunk.get("choices", []):
+                yield choice.get("delta", {}).get("content") or ""
+        else:
+            # Ollama streams one JSON object per line.
+            chunk = json.loads(line)
+            if "error" in chunk:
+                raise RuntimeError(chunk["error"])
+            yield chunk.get("message", {}).get("content", "")
+            if chunk.get("done"):
+                return
+
+
+def read_chat_stream(response, api, stop_sequences):
+    """Reads a streamed chat reply up to its end or the first stop sequence and returns the content."""
+    with response:
+        # Stop reading as soon as the model emits a stop sequence;
+        # closing the connection also cancels a runaway generation.
+        content = ""
+        for piece in iter_stream_content(response, api):
+            content += piece
+            stop_at = min((content.find(stop) for stop in stop_sequences if stop in content), default=-1)
+            if stop_at >= 0:
+                return content[:stop_at]
+    return content
+
+
+def request_ollama_chat(messages, model_name, ollama_url, text_for_log, keep_alive=OLLAMA_KEEP_ALIVE, options=None, api=API_OLLAMA):
+    """
+    Sends a chat request to the translation server over the shared session and streams the reply.
+    Returns the raw message content, or None if the request failed.
+    """
+    options = options or build_ollama_options()
+    payload = build_chat_payload(api, model_name, messages, keep_alive, options, stream=True)
+    stop_sequences = options.get("stop", [])
+    try:
+        for attempt in range(MAX_ATTEMPTS):
+            response = post_with_retries(ollama_url, payload, CHAT_TIMEOUT, stream=True)
+            try:
+                return read_chat_stream(response, api, stop_sequences)
+            except requests.exceptions.ConnectionError as e:
+                # requests reports a stream that stalls past the read timeout as a ConnectionError.
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise requests.exceptions.Timeout(f"Stream stalled: {e}") from e
+                delay = retry_delay(attempt)
+                LOG.warning(f"[Thread-{threading.get_ident()}] [WARNING] Reply stream stalled ({e}). Retrying in {delay:.1f}s (attempt {attempt + 2}/{MAX_ATTEMPTS}).")
+                time.sleep(delay)
     except requests.exceptions.ConnectionError:
         # Adding thread ID for clarity when running in parallel
-        print(f"\n[Thread-{threading.get_ident()}] [ERROR] Could not connect to Ollama API at {ollama_url}. Is Ollama running?")
+        LOG.error(f"[Thread-{threading.get_ident()}] [ERROR] Could not connect to the chat API at {ollama_url}. Is the server running?")
     except requests.exceptions.Timeout:
-        print(f"\n[Thread-{threading.get_ident()}] [ERROR] Request to Ollama API timed out for text: '{text[:50]}...'")
+        LOG.error(f"[Thread-{threading.get_ident()}] [ERROR] Request to Ollama API timed out for text: '{text_for_log[:50]}...'")
     except requests.exceptions.HTTPError as e:
-        print(f"\n[Thread-{threading.get_ident()}] [ERROR] Ollama API request failed: {e.response.status_code} - {e.response.text}")
-    except json.JSONDecodeError:
-        print(f"\n[Thread-{threading.get_ident()}] [ERROR] Could not decode JSON response from Ollama API. Response: {response.text}")
+        LOG.error(f"[Thread-{threading.get_ident()}] [ERROR] Ollama API request failed: {e.response.status_code} - {e.response.text}")
+    except json.JSONDecodeError as e:
+        LOG.error(f"[Thread-{threading.get_ident()}] [ERROR] Could not decode JSON response from Ollama API. Response: {e.doc[:200]}")
     except Exception as e:
-        print(f"\n[Thread-{threading.get_ident()}] [ERROR] An unexpected error occurred during translation: {e} (for text: '{text[:50]}...')")
+        LOG.error(f"[Thread-{threading.get_ident()}] [ERROR] An unexpected error occurred during translation: {e} (for text: '{text_for_log[:50]}...')")
     return None
 
 
-def translate_srt_file_core(input_srt_path, output_srt_path, source_language_name, target_language_name, model_name, ollama_url):
+def clean_translation(translated_text, source_language_name, target_language_name):
+    """
+    Strips model artifacts (think tags, quotes, conversational prefixes) from a translation.
+    Returns None if the reply was cut off inside a reasoning trace and holds no translation.
+    """
+    # 1. Remove <think>...</think> patterns (case-insensitive, multiline)
+    #    Requests set "think": False, but Ollama versions without thinking support ignore it.
+    #    This handles tags that might contain newlines or varying content.
+    translated_text = _THINK_RE.sub("", translated_text)
+    #    A <think> without its closing tag means num_predict cut the reply off inside the
+    #    reasoning trace: everything after it is reasoning, not translation.
+    translated_text, unclosed_think = _UNCLOSED_THINK_RE.subn("", translated_text)
+    if unclosed_think and not translated_text.strip():
+        return None
+
+    # 2. Remove standalone or potentially malformed <think> or </think> tags.
+    #    These are case-sensitive simple replacements as a fallback or for specific known strings.
+    translated_text = translated_text.replace("<think>", "")
+    translated_text = translated_text.replace("</think>", "")
+    translated_text = translated_text.replace(_DOTS, "")
+    # You can add more specific tag cleaning here if other unwanted tags appear.
+
+    # 3. Strip leading/trailing whitespace. Important before quote checking and for general cleanliness.
+    translated_text = translated_text.strip()
+
+    # 4. Strip leading/trailing quotes ONLY if they encapsulate the ENTIRE string.
+    #    The prompt already instructs the model not to do this, but this is a fallback.
+    if len(translated_text) >= 2: # Avoid errors on empty or single-character strings
+        # Consider adding other quote types if your model uses them (e.g., curly quotes “ ”)
+        for quote in ('"', "'"):
+            if translated_text.startswith(quote) and translated_text.endswith(quote):
+                translated_text = translated_text.removeprefix(quote).removesuffix(quote)
+                break
+
+    # 5. Remove common conversational prefixes that might have slipped through.
+    # Ensure prefixes are checked case-insensitively; the text is lowercased only once.
+    lower_text = translated_text.lower()
+    _, common_prefixes_lower = build_prompt_templates(source_language_name, target_language_name)
+    for prefix_lower in common_prefixes_lower:
+        if lower_text.startswith(prefix_lower):
+            translated_text = translated_text[len(prefix_lower):].lstrip() # lstrip to remove any space after prefix
+            break # Only one such prefix occurs in practice.
+
+    # 6. Final strip to clean up any whitespace potentially left by the above operations.
+    return translated_text.strip()
+
+
+def translate_text_ollama(text, source_language_name, target_language_name, model_name, ollama_url, keep_alive=OLLAMA_KEEP_ALIVE,
+                          ollama_options=None, api=API_OLLAMA):
+    """
+    Translates a single piece of text using the Ollama API.
+    """
+    cached = get_cached_translation(text, source_language_name, target_language_name, model_name)
+    if cached is not None:
+        return cached
+
+    messages = build_chat_messages(source_language_name, target_language_name, text)
+    options = request_options(ollama_options, text, SINGLE_LINE_STOP)
+    translated_text = request_ollama_chat(messages, model_name, ollama_url, text, keep_alive, options, api)
+    if translated_text is None:
+        return None
+    translated_text = clean_translation(translated_text, source_language_name, target_language_name)
+    if not translated_text:
+        # An empty translation would drop the subtitle from the output; keep the original instead.
+        return None
+    cache_translation(text, translated_text, source_language_name, target_language_name, model_name)
+    return translated_text
+
+
+def parse_numbered_translations(response_text, expected_count):
+    """
+    Parses a numbered model reply ("1. ...\n2. ...") back into a list of texts.
+    Returns None if the reply does not contain exactly one entry per number 1..expected_count.
+    """
+    items = {}
+    current_number = None
+    for line in response_text.splitlines():
+        match = BATCH_ITEM_RE.match(line)
+        if not match:
+            # Continuation of a translation the model split over several lines.
+            if current_number is not None and line.strip():
+                items[current_number] += "\n" + line.strip()
+            continue
+        current_number = int(match.group(1))
+        if current_number in items or not 1 <= current_number <= expected_count:
+            return None
+        items[current_number] = match.group(2)
+    if len(items) != expected_count:
+        return None
+    return [items[number].replace(BATCH_LINE_BREAK, "\n") for number in range(1, expected_count + 1)]
+
+
+def translate_batch_ollama(texts, source_language_name, target_language_name, model_name, ollama_url, keep_alive=OLLAMA_KEEP_ALIVE,
+                           ollama_options=None, api=API_OLLAMA):
     """
-    Core SRT translation logic.
+    Translates several subtitle texts with a single Ollama request.
+    Returns a list with one translation (or None on failure) per input text.
+    Falls back to line-by-line translation if the batched reply cannot be parsed.
     """
+    if not texts:
+        return []
+
+    # Only texts that are neither cached nor repeated within this batch are sent to the model.
+    results = {}
+    for text in texts:
+        cached = get_cached_translation(text, source_language_name, target_language_name, model_name)
+        if cached is not None:
+            results[text] = cached
+    pending_texts = list(dict.fromkeys(text for text in texts if text not in results))
+
+    if len(pending_texts) == 1:
+        results[pending_texts[0]] = translate_text_ollama(pending_texts[0], source_language_name, target_language_name, model_name, ollama_url,
+                                                          keep_alive, ollama_options, api)
+    elif pending_texts:
+        numbered_lines = "\n".join(
+            f"{number}. {text.replace(chr(10), BATCH_LINE_BREAK)}" for number, text in enumerate(pending_texts, start=1)
+        )
+        messages = build_chat_messages(source_language_name, target_language_name, numbered_lines)
+        options = request_options(ollama_options, numbered_lines, BATCH_STOP)
+        response_text = request_ollama_chat(messages, model_name, ollama_url, pending_texts[0], keep_alive, options, api)
+        parsed = None
+        if response_text is not None:
+            # Think blocks may contain numbered lines of their own; drop them before parsing.
+            response_text = _THINK_RE.sub("", response_text)
+            parsed = parse_numbered_translations(response_text, len(pending_texts))
+            if parsed is None:
+                LOG.warning(f"[Thread-{threading.get_ident()}] [WARNING] Could not parse batched reply for {len(pending_texts)} lines. Falling back to line-by-line translation.")
+
+        if parsed is not None:
+            for text, translated_text in zip(pending_texts, parsed):
+                translated_text = clean_translation(translated_text, source_language_name, target_language_name) or None
+                if translated_text is not None:
+                    cache_translation(text, translated_text, source_language_name, target_language_name, model_name)
+                results[text] = translated_text
+        else:
+            for text in pending_texts:
+                results[text] = translate_text_ollama(text, source_language_name, target_language_name, model_name, ollama_url,
+                                                      keep_alive, ollama_options, api)
+
+    return [results[text] for text in texts]
+
+
+class SubtitleFileJob:
+    """
+    One SRT file being translated. Its distinct texts are translated by the shared worker threads
+    (once per run, even if other files contain them too); the thread that records the file's
+    last missing translation writes the output.
+    """
+
+    def __init__(self, input_srt_path, output_srt_path, subtitles):
+        self.input_srt_path = input_srt_path
+        self.output_srt_path = output_srt_path
+        self.movie_name = os.path.basename(os.path.dirname(input_srt_path))
+        self.subtitles = subtitles
+        # Subtitle indices per distinct text. Trivial lines (music notes, numbers, punctuation)
+        # are kept as-is and repeated lines are only translated once.
+        self.occurrences = {}
+        for i, sub in enumerate(subtitles):
+            if not is_trivial_text(sub.content):
+                self.occurrences.setdefault(sub.content, []).append(i)
+        self.remaining_texts = len(self.occurrences)
+        self.lock = threading.Lock()
+
+    def record_translation(self, text, translated_text):
+        """
+        Stores the translation of one distinct text of this file (None keeps the original lines).
+        Returns (number of subtitle lines covered, whether the whole file is now translated).
+        """
+        with self.lock:
+            for i in self.occurrences[text]:
+                sub = self.subtitles[i]
+                if translated_text is not None:
+                    self.subtitles[i] = srt.Subtitle(index=sub.index, start=sub.start, end=sub.end, content=translated_text)
+                else:
+                    LOG.warning(f"  [Thread-{threading.get_ident()} | {self.movie_name}] [WARNING] Failed to translate line {sub.index} ('{text[:30]}...') from {os.path.basename(self.input_srt_path)} due to an error. Keeping original.")
+            self.remaining_texts -= 1
+            return len(self.occurrences[text]), self.remaining_texts == 0
+
+
+def load_subtitles(input_srt_path):
+    """Reads and parses an SRT file. Returns the list of subtitles, or None if it can't be used."""
     thread_id = threading.get_ident() # Get thread ID for logging
     movie_name_for_log = os.path.basename(os.path.dirname(input_srt_path)) # Get movie folder name
 
@@ -123,108 +546,186 @@ def translate_srt_file_core(input_srt_path, output_srt_path, source_language_nam
         with open(input_srt_path, 'r', encoding='utf-8') as f:
             srt_content = f.read()
     except Exception as e:
-        print(f"[Thread-{thread_id} | {movie_name_for_log}] [ERROR] Could not read input SRT file {input_srt_path}: {e}")
-        return False
+        LOG.error(f"[Thread-{thread_id} | {movie_name_for_log}] [ERROR] Could not read input SRT file {input_srt_path}: {e}")
+        return None
 
+    # Files are parsed completely during the scan pass, before any line is queued: run-wide
+    # dedup needs every file's texts up front, so there is no parse/dispatch overlap to win
+    # (this replaces the per-file streaming parse that fed batches while parsing).
     try:
         subtitles = list(srt.parse(srt_content))
     except Exception as e:
-        print(f"[Thread-{thread_id} | {movie_name_for_log}] [ERROR] Could not parse SRT content from {input_srt_path}. Error: {e}")
-        return False
+        LOG.error(f"[Thread-{thread_id} | {movie_name_for_log}] [ERROR] Could not parse SRT content from {input_srt_path}. Error: {e}")
+        return None
 
     if not subtitles:
-        print(f"[Thread-{thread_id} | {movie_name_for_log}] [INFO] SRT file {input_srt_path} is empty or unparsable.")
+        LOG.info(f"[Thread-{thread_id} | {movie_name_for_log}] [INFO] SRT file {input_srt_path} is empty or unparsable.")
+        return None
+    for sub in subtitles:
+        sub.content = intern_text(sub.content)
+    return subtitles
+
+
+def write_translated_srt(job):
+    """Writes the subtitles of a finished job to its output path."""
+    thread_id = threading.get_ident()
+    output_srt_path = job.output_srt_path
+
+    # Write each subtitle as it is serialized instead of composing the whole file in memory,
+    # into a temporary file that replaces the target only once it is complete.
+    tmp_output_path = output_srt_path + ".tmp"
+    try:
+        with open(tmp_output_path, 'w', encoding='utf-8') as f:
+            # Same ordering, numbering and skipping of empty entries as srt.compose().
+            for sub in srt.sort_and_reindex(job.subtitles, in_place=True):
+                f.write(sub.to_srt())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_output_path, output_srt_path)
+        LOG.info(f"  [Thread-{thread_id} | {job.movie_name}] [SUCCESS] Translated SRT saved to: {output_srt_path}")
+        return True
+    except Exception as e:
+        LOG.error(f"[Thread-{thread_id} | {job.movie_name}] [ERROR] Could not write translated SRT file to {output_srt_path}: {e}")
+        if os.path.exists(tmp_output_path):
+            os.remove(tmp_output_path)
         return False
 
-    translated_subtitles = []
-    # Note: tqdm progress bars from multiple threads might interleave.
-    # For cleaner output, you might disable the inner tqdm or use a thread lock for tqdm updates.
-    # For simplicity, we'll leave it as is; it's often acceptable.
-    # `position` can help if you know the worker ID, but that's more complex with ThreadPoolExecutor.
-    print(f"  [Thread-{thread_id} | {movie_name_for_log}] Translating {os.path.basename(input_srt_path)} ({len(subtitles)} lines) to {target_language_name}...")
-
-    for sub in tqdm(subtitles, desc=f"    Lines [{movie_name_for_log}]", unit="line", leave=False, position=0): # position=0 might help a bit
-        original_text = sub.content
-        if not original_text or not original_text.strip():
-            translated_subtitles.append(srt.Subtitle(index=sub.index, start=sub.start, end=sub.end, content=original_text))
-            continue
 
-        translated_text = translate_text_ollama(original_text, source_language_name, target_language_name, model_name, ollama_url)
+def prepare_srt_job(input_srt_path, output_srt_path):
+    """Parses an SRT file into a SubtitleFileJob. Returns None if the file could not be loaded."""
+    thread_id = threading.get_ident()
+    subtitles = load_subtitles(input_srt_path)
+    if subtitles is None:
+        return None
 
-        if translated_text is not None:
-            new_sub = srt.Subtitle(index=sub.index, start=sub.start, end=sub.end, content=translated_text)
-            translated_subtitles.append(new_sub)
-        else:
-            print(f"\n  [Thread-{thread_id} | {movie_name_for_log}] [WARNING] Failed to translate line {sub.index} ('{original_text[:30]}...') from {os.path.basename(input_srt_path)} due to an error. Keeping original.")
-            translated_subtitles.append(sub)
+    job = SubtitleFileJob(input_srt_path, output_srt_path, subtitles)
+    LOG.info(f"  [Thread-{thread_id} | {job.movie_name}] Loaded {os.path.basename(input_srt_path)} ({len(subtitles)} lines, {len(job.occurrences)} distinct texts).")
+    return job
+
+
+def record_translation(text, translated_text, jobs, progress):
+    """Applies one translation to every job containing `text`, writing the jobs it completes."""
+    for job in jobs:
+        line_count, file_done = job.record_translation(text, translated_text)
+        progress.update(line_count)
+        if file_done:
+            write_translated_srt(job)
 
-    if not translated_subtitles:
-        print(f"[Thread-{thread_id} | {movie_name_for_log}] [ERROR] No subtitles were processed for {input_srt_path}.")
-        return False
 
+def translation_worker(work_queue, translate_args, progress):
+    """
+    Translates (texts, jobs_per_text) batches from the shared work queue until it receives None.
+    Each translation is applied to every file containing that text; the thread that
+    completes a file writes it.
+    """
+    # Load the model and prime the prompt cache before the first real batch.
+    warm_up_ollama(*translate_args)
+
+    while True:
+        item = work_queue.get()
+        if item is None:
+            break
+        texts, jobs_per_text = item
+        try:
+            translations = translate_batch_ollama(texts, *translate_args)
+        except Exception as e:
+            LOG.error(f"[Thread-{threading.get_ident()}] [ERROR] Unexpected error while translating a batch: {e}")
+            translations = [None] * len(texts)
+
+        for text, translated_text, jobs in zip(texts, translations, jobs_per_text):
+            record_translation(text, translated_text, jobs, progress)
+
+
+def load_translation_cache(cache_path):
+    """Loads translations saved by earlier runs into the in-memory cache."""
+    if not cache_path or not os.path.exists(cache_path):
+        return
     try:
-        final_srt_content = srt.compose(translated_subtitles)
-        with open(output_srt_path, 'w', encoding='utf-8') as f:
-            f.write(final_srt_content)
-        print(f"  [Thread-{thread_id} | {movie_name_for_log}] [SUCCESS] Translated SRT saved to: {output_srt_path}")
-        return True
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        for source_language_name, target_language_name, model_name, text, translated_text in entries:
+            if not translated_text:
+                continue # Older runs could save empty translations, which would blank the subtitle
+            cache_translation(text, translated_text, source_language_name, target_language_name, model_name)
+        LOG.info(f"Loaded {len(entries)} cached translations from {cache_path}")
     except Exception as e:
-        print(f"[Thread-{thread_id} | {movie_name_for_log}] [ERROR] Could not write translated SRT file to {output_srt_path}: {e}")
-        return False
+        LOG.warning(f"[WARNING] Could not load translation cache {cache_path}: {e}")
+
+
+def save_translation_cache(cache_path):
+    """Saves the in-memory translation cache so later runs can reuse it."""
+    if not cache_path:
+        return
+    with _CACHE_LOCK:
+        entries = [[*key, translated_text] for key, translated_text in _TRANS_CACHE.items()]
+    tmp_cache_path = cache_path + ".tmp"
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_cache_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_cache_path, cache_path)
+        LOG.info(f"Saved {len(entries)} cached translations to {cache_path}")
+    except Exception as e:
+        LOG.warning(f"[WARNING] Could not save translation cache {cache_path}: {e}")
+
 
 def get_srt_files(folder_path):
     """Returns a list of .srt file paths in the given folder."""
-    return [os.path.join(folder_path, f) for f in os.listdir(folder_path)
-            if os.path.isfile(os.path.join(folder_path, f)) and f.lower().endswith(".srt")]
+    # scandir entries carry the file type, so no extra stat call is needed per file.
+    with os.scandir(folder_path) as entries:
+        return [entry.path for entry in entries if entry.is_file() and entry.name.lower().endswith(".srt")]
+
+def build_language_file_re(*language_tags):
+    """
+    Returns a compiled pattern matching SRT filenames tagged with any of the given language
+    codes/names, e.g. 'movie.en.srt', 'movie-en.srt', 'sub_en.srt' or 'movie.english.forced.srt'.
+    """
+    tags = "|".join(re.escape(tag) for tag in language_tags if tag)
+    return re.compile(rf"(?:[.\-]|sub_)(?:{tags})\.", re.IGNORECASE)
 
-def find_source_srt(srt_files, source_lang_code, source_lang_name_for_log, target_lang_code_to_avoid):
+
+def find_source_srt(srt_files, source_file_re, source_lang_name_for_log, target_file_re):
     """
     Finds a suitable source SRT file.
-    Prioritizes files with source language code, then any other SRT not matching target.
+    Prioritizes files tagged with the source language, then any other SRT not tagged with the target language.
     """
-    preferred_sources = []
-    other_sources = []
+    first_other_source = None
     thread_id = threading.get_ident() # For logging context
 
     for srt_path in srt_files:
-        filename_lower = os.path.basename(srt_path).lower()
-        if f".{target_lang_code_to_avoid}." in filename_lower or \
-           f"-{target_lang_code_to_avoid}." in filename_lower or \
-           f"sub_{target_lang_code_to_avoid}." in filename_lower or \
-           f"sub.{target_lang_code_to_avoid}." in filename_lower:
+        filename = os.path.basename(srt_path)
+        if target_file_re.search(filename):
             continue
+        if source_file_re.search(filename):
+            LOG.info(f"    [Thread-{thread_id}] Found preferred source SRT ({source_lang_name_for_log}): {filename}")
+            return srt_path
+        if first_other_source is None:
+            first_other_source = srt_path
 
-        if f".{source_lang_code}." in filename_lower or f"-{source_lang_code}." in filename_lower or \
-           f"sub_{source_lang_code}." in filename_lower or f"sub.{source_lang_code}." in filename_lower:
-            preferred_sources.append(srt_path)
-        else:
-            other_sources.append(srt_path)
-
-    if preferred_sources:
-        print(f"    [Thread-{thread_id}] Found preferred source SRT ({source_lang_name_for_log}): {os.path.basename(preferred_sources[0])}")
-        return preferred_sources[0]
-    if other_sources:
-        print(f"    [Thread-{thread_id}] Found other source SRT: {os.path.basename(other_sources[0])}")
-        return other_sources[0]
-    return None
+    if first_other_source:
+        LOG.info(f"    [Thread-{thread_id}] Found other source SRT: {os.path.basename(first_other_source)}")
+    return first_other_source
 
 
 def process_movie_folder(movie_path, target_language_name, target_language_code,
                          source_language_name, source_language_code,
-                         model_name, ollama_url, force_translate, skip_if_target_exists):
+                         force_translate, skip_if_target_exists, source_file_re, target_file_re):
     """
-    Processes a single movie folder for SRT translation.
-    This function will be run in a separate thread.
+    Processes a single movie folder: picks the source SRT and loads it for translation.
+    Returns a SubtitleFileJob, or None if nothing needs translating in this folder.
+    The translation itself is done afterwards by the shared worker threads.
     """
     thread_id = threading.get_ident()
     movie_name = os.path.basename(movie_path)
     # Using a more prominent log format for the start of processing a movie folder in parallel
-    print(f"\n[Thread-{thread_id} | MOVIE: {movie_name}] --- Starting processing ---")
+    LOG.info(f"[Thread-{thread_id} | MOVIE: {movie_name}] --- Starting processing ---")
 
     srt_files_in_folder = get_srt_files(movie_path)
     if not srt_files_in_folder:
-        print(f"  [Thread-{thread_id} | {movie_name}] No SRT files found.")
-        print(f"[Thread-{thread_id} | MOVIE: {movie_name}] --- Finished processing (no SRTs) ---")
+        LOG.info(f"  [Thread-{thread_id} | {movie_name}] No SRT files found.")
+        LOG.info(f"[Thread-{thread_id} | MOVIE: {movie_name}] --- Finished processing (no SRTs) ---")
         return
 
     expected_target_filename = f"sub_{target_language_code}.srt"
@@ -232,70 +733,60 @@ def process_movie_folder(movie_path, target_language_name, target_language_code,
 
     if os.path.exists(expected_target_srt_path):
         if force_translate:
-            print(f"  [Thread-{thread_id} | {movie_name}] Target file {expected_target_filename} exists, but --force_translate is set. Re-translating.")
+            LOG.info(f"  [Thread-{thread_id} | {movie_name}] Target file {expected_target_filename} exists, but --force_translate is set. Re-translating.")
         elif skip_if_target_exists:
-            print(f"  [Thread-{thread_id} | {movie_name}] Target file {expected_target_filename} already exists. Skipping.")
-            print(f"[Thread-{thread_id} | MOVIE: {movie_name}] --- Finished processing (skipped) ---")
+            LOG.info(f"  [Thread-{thread_id} | {movie_name}] Target file {expected_target_filename} already exists. Skipping.")
+            LOG.info(f"[Thread-{thread_id} | MOVIE: {movie_name}] --- Finished processing (skipped) ---")
             return
 
     if not (os.path.exists(expected_target_srt_path) and skip_if_target_exists and not force_translate):
         for srt_f_path in srt_files_in_folder:
             if srt_f_path == expected_target_srt_path:
                 continue
-            srt_f_name_lower = os.path.basename(srt_f_path).lower()
-            is_likely_target_lang = (
-                f".{target_language_code}." in srt_f_name_lower or
-                f"-{target_language_code}." in srt_f_name_lower or
-                f".{target_language_name.lower()}." in srt_f_name_lower
-            )
-            if is_likely_target_lang:
-                print(f"  [Thread-{thread_id} | {movie_name}] Found existing SRT likely in target language: {os.path.basename(srt_f_path)}")
+            if target_file_re.search(os.path.basename(srt_f_path)):
+                LOG.info(f"  [Thread-{thread_id} | {movie_name}] Found existing SRT likely in target language: {os.path.basename(srt_f_path)}")
                 try:
                     if os.path.exists(expected_target_srt_path):
                         if force_translate:
-                            print(f"    [Thread-{thread_id} | {movie_name}] Standard target {expected_target_filename} also exists. Will proceed to translate due to --force_translate.")
+                            LOG.info(f"    [Thread-{thread_id} | {movie_name}] Standard target {expected_target_filename} also exists. Will proceed to translate due to --force_translate.")
                         else:
-                            print(f"    [Thread-{thread_id} | {movie_name}] Standard target {expected_target_filename} also exists. Not renaming {os.path.basename(srt_f_path)}.")
+                            LOG.info(f"    [Thread-{thread_id} | {movie_name}] Standard target {expected_target_filename} also exists. Not renaming {os.path.basename(srt_f_path)}.")
                     else:
-                        print(f"    [Thread-{thread_id} | {movie_name}] Renaming {os.path.basename(srt_f_path)} to {expected_target_filename}.")
+                        LOG.info(f"    [Thread-{thread_id} | {movie_name}] Renaming {os.path.basename(srt_f_path)} to {expected_target_filename}.")
                         shutil.move(srt_f_path, expected_target_srt_path)
                         if not force_translate:
-                            print(f"  [Thread-{thread_id} | {movie_name}] Renamed and target file {expected_target_filename} now exists. Skipping further translation.")
-                            print(f"[Thread-{thread_id} | MOVIE: {movie_name}] --- Finished processing (renamed, not forced) ---")
+                            LOG.info(f"  [Thread-{thread_id} | {movie_name}] Renamed and target file {expected_target_filename} now exists. Skipping further translation.")
+                            LOG.info(f"[Thread-{thread_id} | MOVIE: {movie_name}] --- Finished processing (renamed, not forced) ---")
                             return
                         else:
-                            print(f"    [Thread-{thread_id} | {movie_name}] Renamed, but --force_translate is set. Will attempt to re-translate using a source file.")
+                            LOG.info(f"    [Thread-{thread_id} | {movie_name}] Renamed, but --force_translate is set. Will attempt to re-translate using a source file.")
                             srt_files_in_folder = get_srt_files(movie_path)
                 except Exception as e:
-                    print(f"  [Thread-{thread_id} | {movie_name}] [ERROR] Could not rename {os.path.basename(srt_f_path)} to {expected_target_filename}: {e}")
+                    LOG.error(f"  [Thread-{thread_id} | {movie_name}] [ERROR] Could not rename {os.path.basename(srt_f_path)} to {expected_target_filename}: {e}")
                 break
 
     if os.path.exists(expected_target_srt_path) and not force_translate:
-        print(f"  [Thread-{thread_id} | {movie_name}] Target file {expected_target_filename} is present, and --force_translate is not set. Skipping translation step.")
-        print(f"[Thread-{thread_id} | MOVIE: {movie_name}] --- Finished processing (target present, not forced) ---")
+        LOG.info(f"  [Thread-{thread_id} | {movie_name}] Target file {expected_target_filename} is present, and --force_translate is not set. Skipping translation step.")
+        LOG.info(f"[Thread-{thread_id} | MOVIE: {movie_name}] --- Finished processing (target present, not forced) ---")
         return
 
-    srt_files_in_folder = get_srt_files(movie_path)
-    source_srt_path = find_source_srt(srt_files_in_folder, source_language_code, source_language_name, target_language_code)
+    # srt_files_in_folder is up to date here: it is rescanned right after any rename above.
+    source_srt_path = find_source_srt(srt_files_in_folder, source_file_re, source_language_name, target_file_re)
 
     if source_srt_path:
         if source_srt_path == expected_target_srt_path and not force_translate:
-            print(f"  [Thread-{thread_id} | {movie_name}] Source SRT ({os.path.basename(source_srt_path)}) is the same as the target path, and --force_translate is not set. Skipping translation to avoid translating a file onto itself.")
-            print(f"[Thread-{thread_id} | MOVIE: {movie_name}] --- Finished processing (source is target, not forced) ---")
+            LOG.info(f"  [Thread-{thread_id} | {movie_name}] Source SRT ({os.path.basename(source_srt_path)}) is the same as the target path, and --force_translate is not set. Skipping translation to avoid translating a file onto itself.")
+            LOG.info(f"[Thread-{thread_id} | MOVIE: {movie_name}] --- Finished processing (source is target, not forced) ---")
             return
 
-        print(f"  [Thread-{thread_id} | {movie_name}] Attempting translation from '{os.path.basename(source_srt_path)}' to '{expected_target_filename}'.")
-        translate_srt_file_core(
-            source_srt_path,
-            expected_target_srt_path,
-            source_language_name,
-            target_language_name,
-            model_name,
-            ollama_url
-        )
-    else:
-        print(f"  [Thread-{thread_id} | {movie_name}] No suitable source SRT file found for translation (to {target_language_name}, from {source_language_name}).")
-    print(f"[Thread-{thread_id} | MOVIE: {movie_name}] --- Finished processing ---")
+        LOG.info(f"  [Thread-{thread_id} | {movie_name}] Attempting translation from '{os.path.basename(source_srt_path)}' to '{expected_target_filename}'.")
+        job = prepare_srt_job(source_srt_path, expected_target_srt_path)
+        LOG.info(f"[Thread-{thread_id} | MOVIE: {movie_name}] --- Finished processing ---")
+        return job
+
+    LOG.info(f"  [Thread-{thread_id} | {movie_name}] No suitable source SRT file found for translation (to {target_language_name}, from {source_language_name}).")
+    LOG.info(f"[Thread-{thread_id} | MOVIE: {movie_name}] --- Finished processing ---")
+    return None
 
 
 def main():
@@ -308,53 +799,78 @@ def main():
     parser.add_argument("--source_language_code", default="en", help="Short source language code for identifying source files (default: en).")
 
     parser.add_argument("--model", default=DEFAULT_OLLAMA_MODEL, help=f"Ollama model (default: {DEFAULT_OLLAMA_MODEL}).")
-    parser.add_argument("--ollama_url", default=OLLAMA_API_URL, help=f"Ollama API URL (default: {OLLAMA_API_URL}).")
+    parser.add_argument("--api", choices=[API_OLLAMA, API_OPENAI], default=API_OLLAMA,
+                        help="Server API: 'ollama' (/api/chat) or 'openai' for OpenAI-compatible servers such as llama.cpp's llama-server, "
+                             "which batches concurrent requests (default: ollama).")
+    parser.add_argument("--ollama_url", default=None, help=f"Chat API URL (default: {OLLAMA_API_URL}, or {OPENAI_API_URL} with --api openai).")
     parser.add_argument("--force_translate", action="store_true", help="Force translation even if target SRT file already exists.")
     parser.add_argument("--skip_if_target_exists", action=argparse.BooleanOptionalAction, default=True,
                         help="Skip processing if target 'sub_<lang_code>.srt' exists (default: True). Use --no-skip_if_target_exists to disable.")
-    parser.add_argument("--workers", type=int, default=3, help="Number of movie folders to process in parallel (default: 3).")
+    parser.add_argument("--workers", type=int, default=1, help="Number of movie folders to scan and queue in parallel (default: 1).")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help=f"Number of translation threads, i.e. Ollama requests in flight across all movies (default: {DEFAULT_CONCURRENCY}).")
+    parser.add_argument("--batch_size", type=int, default=BATCH_SIZE, help=f"Number of subtitle lines translated per request (default: {BATCH_SIZE}).")
+    parser.add_argument("--temperature", type=float, default=DEFAULT_TEMPERATURE, help=f"Sampling temperature (default: {DEFAULT_TEMPERATURE}).")
+    parser.add_argument("--num_ctx", type=int, default=DEFAULT_NUM_CTX, help=f"Model context window in tokens; raise it for large --batch_size values (default: {DEFAULT_NUM_CTX}).")
+    parser.add_argument("--cache_file", default=DEFAULT_CACHE_FILE, help=f"JSON file that stores translations for reuse across runs; pass '' to disable (default: {DEFAULT_CACHE_FILE}).")
+    parser.add_argument("--keep_alive", default=OLLAMA_KEEP_ALIVE, help=f"How long Ollama keeps the model loaded between requests, e.g. '30m', '1h' or '-1' (default: {OLLAMA_KEEP_ALIVE}).")
 
 
     args = parser.parse_args()
-
-    print(f"--- Batch SRT Translator using Ollama ---")
-    print(f"Movies Root: {args.movies_root_dir}")
-    print(f"Target Language: {args.target_language_name} (code: {args.target_language_code})")
-    print(f"Source Language: {args.source_language_name} (code: {args.source_language_code})")
-    print(f"Ollama Model: {args.model}")
-    print(f"Ollama URL: {args.ollama_url}")
-    print(f"Force Translate: {args.force_translate}")
-    print(f"Skip if Target Exists: {args.skip_if_target_exists}")
-    print(f"Parallel Workers: {args.workers}")
-    print("-----------------------------------------")
+    args.ollama_url = args.ollama_url or DEFAULT_API_URLS[args.api]
+    setup_logging()
+
+    LOG.info(f"--- Batch SRT Translator using Ollama ---")
+    LOG.info(f"Movies Root: {args.movies_root_dir}")
+    LOG.info(f"Target Language: {args.target_language_name} (code: {args.target_language_code})")
+    LOG.info(f"Source Language: {args.source_language_name} (code: {args.source_language_code})")
+    LOG.info(f"Model: {args.model}")
+    LOG.info(f"API: {args.api}")
+    LOG.info(f"API URL: {args.ollama_url}")
+    LOG.info(f"Force Translate: {args.force_translate}")
+    LOG.info(f"Skip if Target Exists: {args.skip_if_target_exists}")
+    LOG.info(f"Parallel Workers: {args.workers}")
+    LOG.info(f"Concurrent Requests: {args.concurrency}")
+    LOG.info(f"Batch Size: {args.batch_size}")
+    LOG.info(f"Keep Alive: {args.keep_alive}")
+    LOG.info(f"Temperature: {args.temperature}")
+    LOG.info(f"Context Window: {args.num_ctx}")
+    LOG.info(f"Translation Cache: {args.cache_file or 'disabled'}")
+    LOG.info("-----------------------------------------")
 
     if not os.path.isdir(args.movies_root_dir):
-        print(f"[ERROR] Movies root directory not found: {args.movies_root_dir}")
+        LOG.error(f"[ERROR] Movies root directory not found: {args.movies_root_dir}")
         return
 
     movies_root_dir_abs = os.path.abspath(args.movies_root_dir)
     movie_folders_to_process = []
 
-    for item_name in os.listdir(movies_root_dir_abs):
-        item_path = os.path.join(movies_root_dir_abs, item_name)
-        if os.path.isdir(item_path):
-            movie_folders_to_process.append(item_path)
+    with os.scandir(movies_root_dir_abs) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                movie_folders_to_process.append(entry.path)
 
     if not movie_folders_to_process:
-        print(f"[INFO] No movie subfolders found in {movies_root_dir_abs}.")
+        LOG.info(f"[INFO] No movie subfolders found in {movies_root_dir_abs}.")
         return
 
-    print(f"Found {len(movie_folders_to_process)} movie folders. Will process up to {args.workers} in parallel.")
+    LOG.info(f"Found {len(movie_folders_to_process)} movie folders. Translating with {args.concurrency} concurrent requests.")
+
+    configure_http_session(args.concurrency)
+    # Load the model once up front so the worker threads don't all wait on (or race) a cold load.
+    ollama_options = build_ollama_options(args.temperature, args.num_ctx)
+    if args.api == API_OLLAMA:
+        # OpenAI-compatible servers load their model at startup.
+        load_ollama_model(args.model, args.ollama_url, args.keep_alive, ollama_options)
+
+    load_translation_cache(args.cache_file)
 
-    # Optional: If tqdm progress bars from threads become too messy,
-    # you can create a lock and pass it to tqdm instances.
-    # tqdm_lock = threading.RLock()
-    # For tqdm, use: `with tqdm_lock: tqdm.write(...)` or pass `lock_args=(tqdm_lock,)`
-    # However, multiple independent tqdm bars for lines might still interleave.
-    # A single overall progress bar for movies is cleaner.
+    # Filename patterns that mark an SRT as being in the source or the target language.
+    source_file_re = build_language_file_re(args.source_language_code, args.source_language_name)
+    target_file_re = build_language_file_re(args.target_language_code, args.target_language_name)
 
     processed_count = 0
-    # Use ThreadPoolExecutor to process movie folders in parallel
+    jobs = []
+    # First pass: scan the movie folders and parse the source SRT files.
     with ThreadPoolExecutor(max_workers=args.workers) as executor:
         # Submit all tasks to the executor
         future_to_movie_path = {
@@ -365,29 +881,74 @@ def main():
                 args.target_language_code,
                 args.source_language_name,
                 args.source_language_code,
-                args.model,
-                args.ollama_url,
                 args.force_translate,
-                args.skip_if_target_exists
+                args.skip_if_target_exists,
+                source_file_re,
+                target_file_re
             ): movie_path for movie_path in movie_folders_to_process
         }
 
-        # Use tqdm for overall progress as tasks complete
-        # The inner tqdm instances for lines per movie will still exist and might interleave their output.
-        for future in tqdm(as_completed(future_to_movie_path), total=len(movie_folders_to_process), desc="Overall Movie Progress", unit="movie"):
+        for future in as_completed(future_to_movie_path):
             movie_path_completed = future_to_movie_path[future]
             try:
-                future.result()  # Retrieve result or raise exception from the completed task
-                # process_movie_folder handles its own success/failure logging for translation
-                # We're just ensuring the thread itself completed.
+                job = future.result()  # Retrieve result or raise exception from the completed task
+                if job is not None:
+                    jobs.append(job)
             except Exception as exc:
                 # This catches exceptions that were not handled within process_movie_folder
                 # or if process_movie_folder itself had a critical failure.
-                print(f"\n[MAIN ERROR] Movie '{os.path.basename(movie_path_completed)}' processing generated an unexpected exception: {exc}")
+                LOG.error(f"[MAIN ERROR] Movie '{os.path.basename(movie_path_completed)}' processing generated an unexpected exception: {exc}")
                 # You might want to log these to a file or handle them more robustly.
             processed_count += 1 # Count that a task (movie folder) has finished processing
 
-    print(f"\n--- Finished processing {processed_count} movie folder(s) out of {len(movie_folders_to_process)} found. ---")
+    # Every distinct text of the whole run is translated once and applied to all files containing it.
+    jobs_per_text = {}
+    for job in jobs:
+        for text in job.occurrences:
+            jobs_per_text.setdefault(text, []).append(job)
+
+    progress = tqdm(total=sum(len(job.subtitles) for job in jobs), desc="Overall Line Progress", unit="line")
+    # Lines that don't need the model count as done right away.
+    for job in jobs:
+        progress.update(len(job.subtitles) - sum(len(indices) for indices in job.occurrences.values()))
+        if job.remaining_texts == 0:
+            write_translated_srt(job)
+
+    texts_to_translate = []
+    for text, text_jobs in jobs_per_text.items():
+        cached = get_cached_translation(text, args.source_language_name, args.target_language_name, args.model)
+        if cached is not None:
+            record_translation(text, cached, text_jobs, progress)
+        else:
+            texts_to_translate.append(text)
+    LOG.info(f"{len(jobs_per_text)} distinct texts in {len(jobs)} file(s); {len(jobs_per_text) - len(texts_to_translate)} found in the cache, {len(texts_to_translate)} to translate.")
+
+    # Second pass: the distinct texts go through one queue, consumed by `concurrency` worker
+    # threads; client-side concurrency then matches what the Ollama server actually runs in parallel.
+    work_queue = queue.Queue()
+    for i in range(0, len(texts_to_translate), args.batch_size):
+        batch_texts = texts_to_translate[i:i + args.batch_size]
+        work_queue.put((batch_texts, [jobs_per_text[text] for text in batch_texts]))
+
+    translate_args = (args.source_language_name, args.target_language_name, args.model, args.ollama_url, args.keep_alive, ollama_options,
+                      args.api)
+    translation_workers = [
+        threading.Thread(target=translation_worker, args=(work_queue, translate_args, progress), name=f"translator-{n}", daemon=True)
+        for n in range(min(args.concurrency, work_queue.qsize()))
+    ]
+    for worker in translation_workers:
+        worker.start()
+    # One stop marker per worker; each worker exits after the queue is drained up to its marker.
+    for _ in translation_workers:
+        work_queue.put(None)
+    try:
+        for worker in translation_workers:
+            worker.join()
+    finally:
+        progress.close()
+        save_translation_cache(args.cache_file)
+
+    LOG.info(f"--- Finished processing {processed_count} movie folder(s) out of {len(movie_folders_to_process)} found. ---")
 
 
 if __name__ == "__main__":